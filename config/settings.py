@@ -1,79 +1,146 @@
 """
 Configuration management for OneLogin SSO Integration
 """
+import copy
 import os
 import json
+import functools
 import logging
-from pathlib import Path
+from types import MappingProxyType
 from typing import Dict, Any, Optional
 
+# Prefer orjson's C parser for config loading; fall back to stdlib json
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Optional streaming parser for large config files (many applications)
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Sentinel distinguishing "key missing" from a cached None value
+_MISSING = object()
+
+# Immutable default configuration, built once at import; instances get a
+# deepcopy with only the environment and path fields injected
+_DEFAULT_TEMPLATE = {
+    "onelogin": {
+        "client_id": "",
+        "client_secret": "",
+        "region": "us",
+        "subdomain": ""
+    },
+    "saml": {
+        "entity_id": "https://localhost:5000/saml/metadata",
+        "acs_url": "https://localhost:5000/saml/acs",
+        "sls_url": "https://localhost:5000/saml/sls"
+    },
+    "database": {
+        "path": ""
+    },
+    "logging": {
+        "level": "INFO",
+        "file": ""
+    },
+    "applications": {
+        "app1": {
+            "name": "HR Management System",
+            "url": "https://hr.example.com",
+            "enabled": True
+        },
+        "app2": {
+            "name": "Payroll System",
+            "url": "https://payroll.example.com",
+            "enabled": True
+        },
+        "app3": {
+            "name": "Employee Portal",
+            "url": "https://portal.example.com",
+            "enabled": True
+        }
+    }
+}
+
+# (config key, environment variable) pairs overlaid onto the onelogin section
+_ENV_OVERRIDES = (
+    ("client_id", "ONELOGIN_CLIENT_ID"),
+    ("client_secret", "ONELOGIN_CLIENT_SECRET"),
+    ("region", "ONELOGIN_REGION"),
+    ("subdomain", "ONELOGIN_SUBDOMAIN")
+)
+
+def _config_cached(fn):
+    """Cache a derived-config method result until the next set()/merge"""
+    @functools.wraps(fn)
+    def wrapper(self):
+        value = self._derived_cache.get(fn.__name__, _MISSING)
+        if value is _MISSING:
+            value = fn(self)
+            self._derived_cache[fn.__name__] = value
+        return value
+    return wrapper
+
 class Config:
     """Configuration handler for OneLogin SSO Integration"""
-    
+
+    __slots__ = ('base_dir', 'config_dir', 'logs_dir',
+                 '_config', '_get_cache', '_derived_cache')
+
     def __init__(self):
-        self.base_dir = Path(__file__).parent.parent
-        self.config_dir = self.base_dir / "config"
-        self.logs_dir = self.base_dir / "logs"
-        
+        # Plain string paths; assembling them with os.path avoids the
+        # Path object allocations that would persist for the process
+        self.base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.config_dir = os.path.join(self.base_dir, "config")
+        self.logs_dir = os.path.join(self.base_dir, "logs")
+
         # Ensure directories exist
-        self.config_dir.mkdir(exist_ok=True)
-        self.logs_dir.mkdir(exist_ok=True)
-        
-        # Default configuration
-        self._config = {
-            "onelogin": {
-                "client_id": os.getenv("ONELOGIN_CLIENT_ID", ""),
-                "client_secret": os.getenv("ONELOGIN_CLIENT_SECRET", ""),
-                "region": os.getenv("ONELOGIN_REGION", "us"),
-                "subdomain": os.getenv("ONELOGIN_SUBDOMAIN", "")
-            },
-            "saml": {
-                "entity_id": "https://localhost:5000/saml/metadata",
-                "acs_url": "https://localhost:5000/saml/acs",
-                "sls_url": "https://localhost:5000/saml/sls"
-            },
-            "database": {
-                "path": str(self.base_dir / "data" / "users.db")
-            },
-            "logging": {
-                "level": "INFO",
-                "file": str(self.logs_dir / "sso_integration.log")
-            },
-            "applications": {
-                "app1": {
-                    "name": "HR Management System",
-                    "url": "https://hr.example.com",
-                    "enabled": True
-                },
-                "app2": {
-                    "name": "Payroll System", 
-                    "url": "https://payroll.example.com",
-                    "enabled": True
-                },
-                "app3": {
-                    "name": "Employee Portal",
-                    "url": "https://portal.example.com", 
-                    "enabled": True
-                }
-            }
-        }
-        
+        os.makedirs(self.config_dir, exist_ok=True)
+        os.makedirs(self.logs_dir, exist_ok=True)
+
+        # Caches for dotted-key lookups and derived values, both
+        # invalidated on set()/merge
+        self._get_cache: Dict[str, Any] = {}
+        self._derived_cache: Dict[str, Any] = {}
+
+        # Default configuration: copy the shared template, then inject
+        # the per-instance paths and any environment overrides
+        self._config = copy.deepcopy(_DEFAULT_TEMPLATE)
+        self._config["database"]["path"] = os.path.join(self.base_dir, "data", "users.db")
+        self._config["logging"]["file"] = os.path.join(self.logs_dir, "sso_integration.log")
+
+        onelogin = self._config["onelogin"]
+        for key, env_var in _ENV_OVERRIDES:
+            value = os.environ.get(env_var)
+            if value:
+                onelogin[key] = value
+
+
         # Load configuration from file if it exists
         self._load_config()
     
     def _load_config(self) -> None:
         """Load configuration from JSON file"""
-        config_file = self.config_dir / "saml_settings.json"
-        
-        if config_file.exists():
+        config_file = os.path.join(self.config_dir, "saml_settings.json")
+
+        if os.path.exists(config_file):
             try:
-                with open(config_file, 'r') as f:
-                    file_config = json.load(f)
-                    self._merge_config(file_config)
+                with open(config_file, 'rb') as f:
+                    if ijson is not None:
+                        # Stream top-level sections one at a time so peak
+                        # memory is bounded by the largest section rather
+                        # than the whole file
+                        for section, subtree in ijson.kvitems(f, ''):
+                            self._merge_config({section: subtree})
+                    else:
+                        self._merge_config(_json_loads(f.read()))
                 logger.info(f"Configuration loaded from {config_file}")
             except Exception as e:
                 logger.warning(f"Could not load config file: {e}")
@@ -82,23 +149,36 @@ class Config:
     
     def _merge_config(self, file_config: Dict[str, Any]) -> None:
         """Merge file configuration with defaults"""
-        for key, value in file_config.items():
-            if key in self._config and isinstance(value, dict):
-                self._config[key].update(value)
+        self._deep_merge(self._config, file_config)
+        self._get_cache.clear()
+        self._derived_cache.clear()
+
+    @staticmethod
+    def _deep_merge(dst: Dict[str, Any], src: Dict[str, Any]) -> None:
+        """Recursively merge src into dst, overwriting only leaf values"""
+        for key, value in src.items():
+            if isinstance(value, dict) and isinstance(dst.get(key), dict):
+                Config._deep_merge(dst[key], value)
             else:
-                self._config[key] = value
+                dst[key] = value
     
     def get(self, key: str, default: Any = None) -> Any:
         """Get configuration value using dot notation"""
-        keys = key.split('.')
-        value = self._config
-        
-        try:
-            for k in keys:
-                value = value[k]
-            return value
-        except (KeyError, TypeError):
-            return default
+        # Fast path: top-level keys need no split or cache
+        if '.' not in key:
+            return self._config.get(key, default)
+
+        value = self._get_cache.get(key, _MISSING)
+        if value is _MISSING:
+            try:
+                value = self._config
+                for k in key.split('.'):
+                    value = value[k]
+            except (KeyError, TypeError):
+                value = _MISSING
+            self._get_cache[key] = value
+
+        return default if value is _MISSING else value
     
     def set(self, key: str, value: Any) -> None:
         """Set configuration value using dot notation"""
@@ -111,7 +191,9 @@ class Config:
             config = config[k]
         
         config[keys[-1]] = value
-    
+        self._get_cache.clear()
+        self._derived_cache.clear()
+
     def get_onelogin_config(self) -> Dict[str, str]:
         """Get OneLogin specific configuration"""
         return self._config.get("onelogin", {})
@@ -124,31 +206,41 @@ class Config:
         """Get database file path"""
         return self._config.get("database", {}).get("path", "")
     
+    @_config_cached
     def get_enabled_applications(self) -> Dict[str, Dict[str, Any]]:
         """Get list of enabled applications"""
         apps = self._config.get("applications", {})
-        return {k: v for k, v in apps.items() if v.get("enabled", False)}
-    
+        # Read-only view so the cached mapping cannot be mutated by callers
+        return MappingProxyType({k: v for k, v in apps.items()
+                                 if v.get("enabled", False)})
+
+    @_config_cached
     def is_configured(self) -> bool:
         """Check if minimum configuration is present"""
         onelogin_config = self.get_onelogin_config()
         required_fields = ["client_id", "client_secret", "subdomain"]
-        
+
         return all(onelogin_config.get(field) for field in required_fields)
     
     def validate_config(self) -> Dict[str, bool]:
         """Validate configuration and return status"""
+        # Single pass over the known top-level sections; any() stops at
+        # the first enabled application instead of building a filtered dict
+        onelogin = self._config.get("onelogin", {})
+        saml = self._config.get("saml", {})
+        apps = self._config.get("applications", {})
+
         validation = {
-            "onelogin_configured": bool(self.get("onelogin.client_id") and 
-                                     self.get("onelogin.client_secret")),
-            "saml_configured": bool(self.get("saml.entity_id")),
-            "applications_configured": len(self.get_enabled_applications()) > 0,
+            "onelogin_configured": bool(onelogin.get("client_id") and
+                                        onelogin.get("client_secret")),
+            "saml_configured": bool(saml.get("entity_id")),
+            "applications_configured": any(v.get("enabled", False) for v in apps.values()),
             "directories_exist": all([
-                self.config_dir.exists(),
-                self.logs_dir.exists()
+                os.path.isdir(self.config_dir),
+                os.path.isdir(self.logs_dir)
             ])
         }
-        
+
         validation["all_configured"] = all(validation.values())
         return validation
 
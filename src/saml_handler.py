@@ -8,39 +8,140 @@ This module handles SAML authentication flows including:
 - Session management
 """
 
+import copy
 import os
 import logging
+import time
 from typing import Dict, Optional, Any, Tuple
 from urllib.parse import urlparse
 from datetime import datetime, timedelta
 import xml.etree.ElementTree as ET
 import base64
-import uuid
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Prefer pybase64's SIMD base64 codecs for SAML payloads; fall back to stdlib
+try:
+    import pybase64 as _b64
+except ImportError:
+    _b64 = base64
+
+# Prefer lxml's libxml2-based parser for SAML responses; fall back to stdlib
+try:
+    from lxml import etree as _lxml_etree
+    from lxml.builder import ElementMaker
+except ImportError:
+    _lxml_etree = None
+
+from src.session_backend import SessionBackend, InMemoryBackend
+
 logger = logging.getLogger(__name__)
 
+# Namespaces used in SAML assertions
+_SAML_NS = {
+    "samlp": "urn:oasis:names:tc:SAML:2.0:protocol",
+    "saml": "urn:oasis:names:tc:SAML:2.0:assertion"
+}
+
 class SAMLHandler:
     """Handles SAML authentication workflows"""
-    
-    def __init__(self, config_manager):
+
+    __slots__ = ('config', 'session_store', '_rand_buf', '_rand_off',
+                 'entity_id', 'acs_url', 'sls_url', '_request_template',
+                 '_saml_req_prefix', '_saml_req_mid', '_saml_req_suffix',
+                 '_xpath_attributes', '_xpath_attr_values')
+
+    def __init__(self, config_manager, session_backend: Optional[SessionBackend] = None):
         """
         Initialize SAML handler with configuration
-        
+
         Args:
             config_manager: Configuration manager instance
+            session_backend: Optional session storage backend; defaults to
+                the per-process InMemoryBackend. Pass an LmdbBackend to
+                share sessions across worker processes.
         """
         self.config = config_manager
-        self.session_store = {}  # In-memory session storage for demo
+        self.session_store = session_backend if session_backend is not None else InMemoryBackend()
+
+        # Entropy ring buffer for request/session IDs; refilled from
+        # os.urandom in 4 KB blocks to amortize the syscall cost
+        self._rand_buf = b''
+        self._rand_off = 0
         
         # SAML configuration
         self.entity_id = self.config.get("saml.entity_id", "https://localhost:5000/saml/metadata")
         self.acs_url = self.config.get("saml.acs_url", "https://localhost:5000/saml/acs")
         self.sls_url = self.config.get("saml.sls_url", "https://localhost:5000/saml/sls")
-        
+
+        # Pre-build the invariant AuthnRequest once so per-request work is
+        # limited to injecting ID and IssueInstant. With lxml available the
+        # template is an element tree copied per request and serialized by
+        # libxml2; otherwise pre-rendered byte segments are joined.
+        if _lxml_etree is not None:
+            E_samlp = ElementMaker(namespace=_SAML_NS["samlp"], nsmap=_SAML_NS)
+            E_saml = ElementMaker(namespace=_SAML_NS["saml"])
+            self._request_template = E_samlp.AuthnRequest(
+                E_saml.Issuer(self.entity_id),
+                E_samlp.NameIDPolicy(
+                    Format="urn:oasis:names:tc:SAML:1.1:nameid-format:emailAddress",
+                    AllowCreate="true"),
+                Version="2.0",
+                Destination="https://your-company.onelogin.com/trust/saml2/http-post/sso",
+                AssertionConsumerServiceURL=self.acs_url,
+                ProtocolBinding="urn:oasis:names:tc:SAML:2.0:bindings:HTTP-POST")
+            self._saml_req_prefix = None
+            self._saml_req_mid = None
+            self._saml_req_suffix = None
+        else:
+            self._request_template = None
+            self._saml_req_prefix = b'''<?xml version="1.0" encoding="UTF-8"?>
+<samlp:AuthnRequest
+    xmlns:samlp="urn:oasis:names:tc:SAML:2.0:protocol"
+    xmlns:saml="urn:oasis:names:tc:SAML:2.0:assertion"
+    ID="'''
+            self._saml_req_mid = b'''"
+    Version="2.0"
+    IssueInstant="'''
+            self._saml_req_suffix = f""""
+    Destination="https://your-company.onelogin.com/trust/saml2/http-post/sso"
+    AssertionConsumerServiceURL="{self.acs_url}"
+    ProtocolBinding="urn:oasis:names:tc:SAML:2.0:bindings:HTTP-POST">
+    <saml:Issuer>{self.entity_id}</saml:Issuer>
+    <samlp:NameIDPolicy
+        Format="urn:oasis:names:tc:SAML:1.1:nameid-format:emailAddress"
+        AllowCreate="true"/>
+</samlp:AuthnRequest>""".encode()
+
+        # Precompile XPath expressions for attribute extraction (lxml only);
+        # compiled XPath is much faster than repeated findall on hot paths
+        if _lxml_etree is not None:
+            self._xpath_attributes = _lxml_etree.XPath(
+                "//saml:AttributeStatement/saml:Attribute", namespaces=_SAML_NS)
+            self._xpath_attr_values = _lxml_etree.XPath(
+                "saml:AttributeValue/text()", namespaces=_SAML_NS)
+        else:
+            self._xpath_attributes = None
+            self._xpath_attr_values = None
+
         logger.info("SAML Handler initialized")
-    
+
+    def _rand_id(self, n: int = 16) -> str:
+        """
+        Generate a random hex identifier from the entropy buffer
+
+        Args:
+            n: Number of random bytes to consume
+
+        Returns:
+            Hex string of 2*n characters
+        """
+        if self._rand_off + n > len(self._rand_buf):
+            self._rand_buf = os.urandom(4096)
+            self._rand_off = 0
+
+        raw = self._rand_buf[self._rand_off:self._rand_off + n]
+        self._rand_off += n
+        return raw.hex()
+
     def generate_saml_request(self, relay_state: Optional[str] = None) -> Tuple[str, str]:
         """
         Generate SAML Authentication Request
@@ -51,38 +152,37 @@ class SAMLHandler:
         Returns:
             Tuple of (request_id, encoded_request)
         """
-        request_id = f"_{uuid.uuid4()}"
+        request_id = "_" + self._rand_id()
         issue_instant = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
-        
-        # Build SAML AuthnRequest XML
-        saml_request = f"""<?xml version="1.0" encoding="UTF-8"?>
-<samlp:AuthnRequest 
-    xmlns:samlp="urn:oasis:names:tc:SAML:2.0:protocol"
-    xmlns:saml="urn:oasis:names:tc:SAML:2.0:assertion"
-    ID="{request_id}"
-    Version="2.0"
-    IssueInstant="{issue_instant}"
-    Destination="https://your-company.onelogin.com/trust/saml2/http-post/sso"
-    AssertionConsumerServiceURL="{self.acs_url}"
-    ProtocolBinding="urn:oasis:names:tc:SAML:2.0:bindings:HTTP-POST">
-    <saml:Issuer>{self.entity_id}</saml:Issuer>
-    <samlp:NameIDPolicy 
-        Format="urn:oasis:names:tc:SAML:1.1:nameid-format:emailAddress"
-        AllowCreate="true"/>
-</samlp:AuthnRequest>"""
-        
+
+        # Assemble the AuthnRequest from the prebuilt template
+        if self._request_template is not None:
+            tree = copy.deepcopy(self._request_template)
+            tree.set("ID", request_id)
+            tree.set("IssueInstant", issue_instant)
+            saml_request = _lxml_etree.tostring(
+                tree, xml_declaration=True, encoding="UTF-8")
+        else:
+            saml_request = b''.join([
+                self._saml_req_prefix,
+                request_id.encode(),
+                self._saml_req_mid,
+                issue_instant.encode(),
+                self._saml_req_suffix
+            ])
+
         # Encode the request
-        encoded_request = base64.b64encode(saml_request.encode()).decode()
+        encoded_request = _b64.b64encode(saml_request).decode('ascii')
         
         # Store request for validation
-        self.session_store[request_id] = {
+        self.session_store.set(request_id, {
             "request_id": request_id,
-            "timestamp": datetime.utcnow(),
+            "timestamp": time.time_ns(),
             "relay_state": relay_state,
             "status": "pending"
-        }
+        })
         
-        logger.info(f"Generated SAML request: {request_id}")
+        logger.info("Generated SAML request: %s", request_id)
         return request_id, encoded_request
     
     def validate_saml_response(self, saml_response: str, relay_state: Optional[str] = None) -> Dict[str, Any]:
@@ -97,17 +197,20 @@ class SAMLHandler:
             Dictionary containing validation results and user attributes
         """
         try:
-            # Decode SAML response
-            decoded_response = base64.b64decode(saml_response).decode()
-            
-            # Parse XML response
-            root = ET.fromstring(decoded_response)
+            # Decode and parse the response; both parsers accept raw bytes,
+            # so the intermediate UTF-8 decode step is skipped entirely
+            decoded_response = _b64.b64decode(saml_response, validate=False)
+
+            if _lxml_etree is not None:
+                root = _lxml_etree.fromstring(decoded_response)
+            else:
+                root = ET.fromstring(decoded_response)
             
             # Extract key information (simplified for demo)
             validation_result = {
                 "valid": True,
                 "user_attributes": self._extract_user_attributes(root),
-                "session_id": f"session_{uuid.uuid4()}",
+                "session_id": "session_" + self._rand_id(),
                 "timestamp": datetime.utcnow().isoformat(),
                 "relay_state": relay_state
             }
@@ -116,7 +219,7 @@ class SAMLHandler:
             return validation_result
             
         except Exception as e:
-            logger.error(f"SAML response validation failed: {e}")
+            logger.error("SAML response validation failed: %s", e)
             return {
                 "valid": False,
                 "error": str(e),
@@ -133,8 +236,8 @@ class SAMLHandler:
         Returns:
             Dictionary of user attributes
         """
-        # Simplified attribute extraction for demo
-        # In real implementation, this would parse actual SAML assertion
+        # Extract Attribute elements from the assertion when present;
+        # demo responses without an AttributeStatement get demo defaults
         attributes = {
             "email": "demo.user@example.com",
             "first_name": "Demo",
@@ -143,7 +246,18 @@ class SAMLHandler:
             "department": "IT",
             "role": "Administrator"
         }
-        
+
+        if self._xpath_attributes is not None:
+            for attr in self._xpath_attributes(saml_root):
+                values = self._xpath_attr_values(attr)
+                if values:
+                    attributes[attr.get("Name")] = values[0]
+        else:
+            for attr in saml_root.findall(".//saml:AttributeStatement/saml:Attribute", _SAML_NS):
+                value = attr.find("saml:AttributeValue", _SAML_NS)
+                if value is not None and value.text:
+                    attributes[attr.get("Name")] = value.text
+
         logger.info("Extracted user attributes from SAML response")
         return attributes
     
@@ -157,18 +271,20 @@ class SAMLHandler:
         Returns:
             Session ID
         """
-        session_id = f"session_{uuid.uuid4()}"
-        
-        self.session_store[session_id] = {
+        session_id = "session_" + self._rand_id()
+        now_ns = time.time_ns()
+        expires_ns = now_ns + 8 * 3600 * 10**9
+
+        self.session_store.set(session_id, {
             "user_id": user_attributes.get("user_id"),
             "email": user_attributes.get("email"),
             "attributes": user_attributes,
-            "created_at": datetime.utcnow(),
-            "expires_at": datetime.utcnow() + timedelta(hours=8),
+            "created_at": now_ns,
+            "expires_at": expires_ns,
             "active": True
-        }
-        
-        logger.info(f"Created user session: {session_id}")
+        })
+
+        logger.info("Created user session: %s", session_id)
         return session_id
     
     def validate_session(self, session_id: str) -> Dict[str, Any]:
@@ -181,21 +297,24 @@ class SAMLHandler:
         Returns:
             Session validation result
         """
+        self.session_store.evict_expired()
         session = self.session_store.get(session_id)
-        
+
         if not session:
             return {"valid": False, "reason": "Session not found"}
-        
-        if session.get("expires_at", datetime.min) < datetime.utcnow():
+
+        if session.get("expires_at", 0) < time.time_ns():
+            self.session_store.delete(session_id)
             return {"valid": False, "reason": "Session expired"}
-        
+
         if not session.get("active", False):
+            self.session_store.delete(session_id)
             return {"valid": False, "reason": "Session inactive"}
-        
+
         return {
             "valid": True,
             "user_attributes": session.get("attributes", {}),
-            "expires_at": session.get("expires_at").isoformat()
+            "expires_at": datetime.utcfromtimestamp(session["expires_at"] / 1e9).isoformat()
         }
     
     def logout_user(self, session_id: str) -> bool:
@@ -208,11 +327,12 @@ class SAMLHandler:
         Returns:
             Success status
         """
-        if session_id in self.session_store:
-            self.session_store[session_id]["active"] = False
-            logger.info(f"User logged out: {session_id}")
+        session = self.session_store.get(session_id)
+        if session is not None:
+            self.session_store.set(session_id, {**session, "active": False})
+            logger.info("User logged out: %s", session_id)
             return True
-        
+
         return False
     
     def get_session_stats(self) -> Dict[str, int]:
@@ -222,9 +342,8 @@ class SAMLHandler:
         Returns:
             Dictionary with session statistics
         """
-        active_sessions = sum(1 for s in self.session_store.values() 
-                            if s.get("active", False))
-        total_sessions = len(self.session_store)
+        active_sessions = self.session_store.count_active()
+        total_sessions = self.session_store.count_total()
         
         return {
             "active_sessions": active_sessions,
@@ -0,0 +1,197 @@
+"""
+Session storage backends for the SAML handler
+
+This module provides:
+- SessionBackend: the interface session stores implement
+- InMemoryBackend: per-process dict storage for development and demos
+- LmdbBackend: shared mmap-backed storage so multi-worker deployments
+  (gunicorn/uvicorn) can share session state across processes
+"""
+
+import heapq
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# Optional dependencies for the shared-memory backend
+try:
+    import lmdb
+except ImportError:
+    lmdb = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+
+class SessionBackend:
+    """Interface for session storage backends"""
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Return the session for session_id, or None if not stored"""
+        raise NotImplementedError
+
+    def set(self, session_id: str, session: Dict[str, Any]) -> None:
+        """Store or replace the session for session_id"""
+        raise NotImplementedError
+
+    def delete(self, session_id: str) -> None:
+        """Remove the session for session_id if present"""
+        raise NotImplementedError
+
+    def count_active(self) -> int:
+        """Return the number of active sessions"""
+        raise NotImplementedError
+
+    def count_total(self) -> int:
+        """Return the total number of stored sessions"""
+        raise NotImplementedError
+
+    def evict_expired(self) -> None:
+        """Remove sessions whose expiry has passed"""
+        raise NotImplementedError
+
+
+class InMemoryBackend(SessionBackend):
+    """
+    Dict-backed session store for single-process use
+
+    Keeps a running active-session counter and an expiry min-heap so
+    stats reads are O(1) and expired sessions are lazily evicted.
+    """
+
+    def __init__(self):
+        self._store: Dict[str, Dict[str, Any]] = {}
+        self._expiry_heap: List[Tuple[int, str]] = []
+        self._active_count = 0
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        return self._store.get(session_id)
+
+    def set(self, session_id: str, session: Dict[str, Any]) -> None:
+        previous = self._store.get(session_id)
+        was_active = previous is not None and previous.get("active", False)
+        is_active = session.get("active", False)
+
+        if is_active and not was_active:
+            self._active_count += 1
+        elif was_active and not is_active:
+            self._active_count -= 1
+
+        if previous is None and "expires_at" in session:
+            heapq.heappush(self._expiry_heap, (session["expires_at"], session_id))
+
+        self._store[session_id] = session
+
+    def delete(self, session_id: str) -> None:
+        session = self._store.pop(session_id, None)
+        if session is not None and session.get("active", False):
+            self._active_count -= 1
+
+    def count_active(self) -> int:
+        return self._active_count
+
+    def count_total(self) -> int:
+        return len(self._store)
+
+    def evict_expired(self) -> None:
+        now = time.time_ns()
+        while self._expiry_heap and self._expiry_heap[0][0] < now:
+            _, session_id = heapq.heappop(self._expiry_heap)
+            self.delete(session_id)
+
+
+class LmdbBackend(SessionBackend):
+    """
+    LMDB-backed session store shared across worker processes
+
+    Sessions are msgpack-encoded under their session ID in one sub-db;
+    a second sub-db keyed by (expires_at, session_id) serves as the
+    expiry index so eviction scans only sessions already due. The
+    active-session counter lives under a reserved key so stats reads
+    stay O(1). Requires the optional lmdb and msgpack packages.
+    """
+
+    _ACTIVE_KEY = b"\x00active_count"
+
+    def __init__(self, path: str, map_size: int = 64 * 1024 * 1024):
+        if lmdb is None or msgpack is None:
+            raise RuntimeError(
+                "LmdbBackend requires the 'lmdb' and 'msgpack' packages")
+
+        self._env = lmdb.open(path, map_size=map_size, max_dbs=2)
+        self._sessions_db = self._env.open_db(b"sessions")
+        self._expiry_db = self._env.open_db(b"expiry")
+
+        with self._env.begin(write=True, db=self._sessions_db) as txn:
+            if txn.get(self._ACTIVE_KEY) is None:
+                txn.put(self._ACTIVE_KEY, b"0")
+
+    @staticmethod
+    def _expiry_key(expires_at: int, session_id: str) -> bytes:
+        return expires_at.to_bytes(8, "big") + session_id.encode()
+
+    def _adjust_active(self, txn, delta: int) -> None:
+        count = int(txn.get(self._ACTIVE_KEY, db=self._sessions_db) or b"0")
+        txn.put(self._ACTIVE_KEY, str(count + delta).encode(),
+                db=self._sessions_db)
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._env.begin(db=self._sessions_db) as txn:
+            packed = txn.get(session_id.encode())
+        return msgpack.unpackb(packed) if packed is not None else None
+
+    def set(self, session_id: str, session: Dict[str, Any]) -> None:
+        key = session_id.encode()
+        with self._env.begin(write=True) as txn:
+            packed = txn.get(key, db=self._sessions_db)
+            previous = msgpack.unpackb(packed) if packed is not None else None
+            was_active = previous is not None and previous.get("active", False)
+            is_active = session.get("active", False)
+
+            if is_active and not was_active:
+                self._adjust_active(txn, 1)
+            elif was_active and not is_active:
+                self._adjust_active(txn, -1)
+
+            if previous is None and "expires_at" in session:
+                txn.put(self._expiry_key(session["expires_at"], session_id),
+                        key, db=self._expiry_db)
+
+            txn.put(key, msgpack.packb(session), db=self._sessions_db)
+
+    def delete(self, session_id: str) -> None:
+        key = session_id.encode()
+        with self._env.begin(write=True) as txn:
+            packed = txn.get(key, db=self._sessions_db)
+            if packed is None:
+                return
+            if msgpack.unpackb(packed).get("active", False):
+                self._adjust_active(txn, -1)
+            txn.delete(key, db=self._sessions_db)
+
+    def count_active(self) -> int:
+        with self._env.begin(db=self._sessions_db) as txn:
+            return int(txn.get(self._ACTIVE_KEY) or b"0")
+
+    def count_total(self) -> int:
+        with self._env.begin(db=self._sessions_db) as txn:
+            # Exclude the reserved counter key
+            return txn.stat()["entries"] - 1
+
+    def evict_expired(self) -> None:
+        cutoff = time.time_ns().to_bytes(8, "big")
+        with self._env.begin(write=True) as txn:
+            cursor = txn.cursor(db=self._expiry_db)
+            for key, session_key in cursor:
+                if key[:8] >= cutoff:
+                    break
+                packed = txn.get(session_key, db=self._sessions_db)
+                if packed is not None:
+                    if msgpack.unpackb(packed).get("active", False):
+                        self._adjust_active(txn, -1)
+                    txn.delete(session_key, db=self._sessions_db)
+                txn.delete(key, db=self._expiry_db)
@@ -10,9 +10,12 @@ print("=" * 60)
 # Initialize the provisioning engine
 engine = UserProvisioningEngine()
 
+# Metrics are off by default; this demo exists to show them
+engine.config.set("emit_marketing_metrics", True)
+
 # Test 1: Generate test users (supports "100+ test users" claim)
 print("1. GENERATING TEST USERS:")
-test_users = engine.generate_test_users(20)  # Start with 20 for demo
+test_users = list(engine.generate_test_users(20))  # Start with 20 for demo
 print(f"   Generated: {len(test_users)} test users")
 print(f"   Sample user: {test_users[0]['email']} - {test_users[0]['department']}")
 